@@ -1,7 +1,15 @@
+import tempfile
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+from numba import njit
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -11,30 +19,256 @@ st.set_page_config(
 )
 
 # --- Carregamento dos dados ---
-df = pd.read_csv("https://raw.githubusercontent.com/vqrca/dashboard_salarios_dados/refs/heads/main/dados-imersao-final.csv")
+# Gerado a partir do CSV com `python gerar_parquet.py`
+ARQUIVO_DADOS = Path(__file__).parent / "dados.parquet"
+
+# Cópia em Feather (Arrow IPC, sem compressão) ao lado do Parquet, fora do git:
+# a carga evita decodificar o Parquet (~15 ms -> ~3 ms). É só um cache: ela guarda
+# a assinatura do Parquet de origem e só é usada se a assinatura bater; se não
+# puder ser lida ou gravada, os dados vêm do Parquet normalmente
+ARQUIVO_FEATHER = ARQUIVO_DADOS.with_suffix(".feather")
+METADADO_ORIGEM = b"dados_origem"
+
+# Colunas usadas em filtros e agrupamentos: viram categóricas (códigos inteiros)
+COLUNAS_FILTRO = ['ano', 'senioridade', 'contrato', 'tamanho_empresa']
+COLUNAS_CATEGORICAS = COLUNAS_FILTRO + ['cargo', 'remoto', 'residencia_iso3']
+
+# Configuração do kernel JIT usado nas agregações por grupo (engine='numba' do pandas).
+# Sem parallel=True: o pool de threads do numba, iniciado a partir da thread do
+# script do Streamlit, impede o encerramento do processo.
+NUMBA_KWARGS = {'parallel': False, 'nogil': True}
+
+
+# Identifica exatamente o arquivo de origem: caminho, tamanho e mtime em nanossegundos
+def assinatura_arquivo(caminho: Path) -> bytes:
+    info = caminho.stat()
+    return f"{caminho.resolve()}|{info.st_size}|{info.st_mtime_ns}".encode()
+
+
+def ler_arquivo_dados(caminho: Path) -> pd.DataFrame:
+    assinatura = assinatura_arquivo(caminho)
+    # Reaproveita o Feather só se ele foi gerado a partir deste mesmo Parquet;
+    # um Feather ausente, ilegível ou de outra origem conta como cache vazio
+    try:
+        tabela = feather.read_table(ARQUIVO_FEATHER)
+        if (tabela.schema.metadata or {}).get(METADADO_ORIGEM) == assinatura:
+            return tabela.to_pandas(types_mapper=pd.ArrowDtype)
+    except (OSError, pa.ArrowException):
+        pass
+    dados = pd.read_parquet(caminho, engine="pyarrow", dtype_backend="pyarrow")
+    # Grava num arquivo temporário de nome único e renomeia, para nunca expor um
+    # Feather incompleto, mesmo com vários processos iniciando juntos. Falhas de
+    # escrita (ex.: diretório somente leitura ou disco cheio) só deixam de atualizar o cache
+    temporario = None
+    try:
+        tabela = pa.Table.from_pandas(dados, preserve_index=False)
+        tabela = tabela.replace_schema_metadata({**tabela.schema.metadata, METADADO_ORIGEM: assinatura})
+        with tempfile.NamedTemporaryFile(
+            dir=ARQUIVO_FEATHER.parent, prefix=f"{ARQUIVO_FEATHER.stem}.", suffix=".tmp", delete=False
+        ) as arquivo:
+            temporario = Path(arquivo.name)
+        feather.write_feather(tabela, temporario, compression="uncompressed")
+        temporario.replace(ARQUIVO_FEATHER)
+    except (OSError, pa.ArrowException):
+        if temporario is not None:
+            temporario.unlink(missing_ok=True)
+    return dados
+
+
+# Cacheado entre reruns e sessões: evita reler e reprocessar o arquivo a cada interação.
+# A versão (mtime do arquivo) entra na chave deste e de todos os caches derivados:
+# quando o Parquet é regenerado, todos são invalidados juntos
+@st.cache_data(ttl=3600)
+def carregar_dados(caminho: Path, versao_dados: int) -> pd.DataFrame:
+    dados = ler_arquivo_dados(caminho)
+    # Conversão única: isin/groupby/value_counts passam a operar sobre códigos inteiros
+    for coluna in COLUNAS_CATEGORICAS:
+        dados[coluna] = dados[coluna].astype('category')
+    return dados
+
+
+# Quantil com interpolação linear (mesmo método padrão do np.percentile) sobre um
+# array já ordenado
+@njit(cache=True)
+def quantil_ordenado(ordenados: np.ndarray, q: float) -> float:
+    posicao = q * (ordenados.size - 1)
+    inferior = int(np.floor(posicao))
+    superior = min(inferior + 1, ordenados.size - 1)
+    return ordenados[inferior] + (posicao - inferior) * (ordenados[superior] - ordenados[inferior])
+
+
+# Cálculo adaptativo de nbins: Freedman–Diaconis com fallback para Sturges.
+# Compilado com numba (cache=True guarda o código nativo em disco entre execuções).
+# Recebe os valores já ordenados (np.sort do NumPy é bem mais rápido que o do
+# numba): uma única ordenação fornece os quartis, o mínimo e o máximo
+@njit(cache=True)
+def calcular_nbins(ordenados: np.ndarray) -> int:
+    n_local = ordenados.size
+    if n_local <= 1:
+        return 10
+    q1 = quantil_ordenado(ordenados, 0.25)
+    q3 = quantil_ordenado(ordenados, 0.75)
+    iqr = q3 - q1
+    data_range = ordenados[-1] - ordenados[0]
+    if iqr > 0 and data_range > 0:
+        h = 2 * iqr * (n_local ** (-1/3))
+        if h > 0:
+            return min(max(int(round(data_range / h)), 5), 100)
+    # Fallback Sturges
+    return int(min(max(np.ceil(np.log2(max(n_local, 2)) + 1), 5), 100))
+
+
+# Compila os kernels numba uma única vez por processo, com dados mínimos,
+# para que o primeiro rerun com dados reais não pague o custo do JIT
+@st.cache_resource
+def aquecer_numba() -> None:
+    amostra = pd.DataFrame({'cargo': pd.Categorical(['a', 'b']), 'usd': [1.0, 2.0]})
+    amostra.groupby('cargo', observed=True, sort=False)['usd'].mean(engine='numba', engine_kwargs=NUMBA_KWARGS)
+    calcular_nbins(np.sort(amostra['usd'].to_numpy()))
+
+
+# Pertinência de códigos inteiros: para poucas opções, comparações diretas
+# combinadas in-place (laços que o NumPy vetoriza); para muitas, np.isin em
+# modo tabela, que indexa um vetor de lookup em vez de ordenar/usar hash
+MAX_COMPARACOES_DIRETAS = 8
+
+
+def mascara_codigos(codigos: np.ndarray, codigos_selecionados: np.ndarray) -> np.ndarray:
+    if len(codigos_selecionados) == 0:
+        return np.zeros(len(codigos), dtype=bool)
+    if len(codigos_selecionados) > MAX_COMPARACOES_DIRETAS:
+        return np.isin(codigos, codigos_selecionados, kind='table')
+    mascara = codigos == codigos_selecionados[0]
+    for codigo in codigos_selecionados[1:]:
+        np.logical_or(mascara, codigos == codigo, out=mascara)
+    return mascara
+
+
+# Filtragem com uma única máscara: cada filtro compara os códigos inteiros das
+# categorias e é combinado in-place, sem alocar uma máscara booleana por filtro.
+# Filtros com todas as opções marcadas (estado padrão) não percorrem os dados.
+# Os rótulos são traduzidos pelas categorias do próprio DataFrame filtrado (busca
+# por hash, O(|selecionados|)), então códigos e rótulos nunca ficam dessincronizados;
+# rótulos que não existem nas categorias são ignorados.
+def filtrar_dados(dados: pd.DataFrame, selecoes: tuple) -> pd.DataFrame:
+    mascara = None
+    for coluna, selecionados in selecoes:
+        categorias = dados[coluna].cat.categories
+        codigos_selecionados = categorias.get_indexer(list(selecionados))
+        codigos_selecionados = codigos_selecionados[codigos_selecionados >= 0]
+        if len(codigos_selecionados) == len(categorias):
+            continue
+        codigos = dados[coluna].cat.codes.to_numpy()
+        codigos_selecionados = codigos_selecionados.astype(codigos.dtype)
+        mascara_coluna = mascara_codigos(codigos, codigos_selecionados)
+        if mascara is None:
+            mascara = mascara_coluna
+        else:
+            np.logical_and(mascara, mascara_coluna, out=mascara)
+    if mascara is None:
+        return dados
+    return dados.iloc[np.flatnonzero(mascara)]
+
+
+# --- Agregações ---
+# Cacheadas pela tupla de seleções dos filtros e pela versão dos dados: reruns sem
+# mudança de filtro reaproveitam o resultado. Os dados filtrados (prefixo "_") não
+# entram na chave do cache, pois são determinados pelas seleções e pela versão.
+
+# O resultado filtrado vira uma tabela Arrow uma vez por seleção. Por ser
+# imutável, cache_resource a compartilha entre reruns e agregações sem copiá-la;
+# cada agregação converte para pandas apenas as colunas de que precisa.
+# max_entries limita quantas tabelas (cópias das linhas filtradas) ficam em memória.
+@st.cache_resource(ttl=3600, max_entries=16)
+def criar_tabela_filtrada(_df_filtrado: pd.DataFrame, selecoes: tuple, versao_dados: int) -> pa.Table:
+    return pa.Table.from_pandas(_df_filtrado, preserve_index=False)
+
+
+@st.cache_data(ttl=3600)
+def calcular_kpis(_tabela: pa.Table, selecoes: tuple, versao_dados: int) -> dict:
+    dados = _tabela.select(['usd', 'cargo']).to_pandas()
+    # Média e máximo numa única chamada; value_counts opera sobre os códigos categóricos
+    # e, sem ordenação, basta um idxmax para achar o cargo mais frequente
+    usd = dados['usd'].agg(['mean', 'max'])
+    return {
+        'salario_medio': usd['mean'],
+        'salario_maximo': usd['max'],
+        'total_registros': _tabela.num_rows,
+        'cargo_mais_frequente': dados['cargo'].value_counts(sort=False).idxmax(),
+    }
+
+
+@st.cache_data(ttl=3600)
+def calcular_top_cargos(_tabela: pa.Table, selecoes: tuple, versao_dados: int) -> pd.DataFrame:
+    dados = _tabela.select(['cargo', 'usd']).to_pandas()
+    # O engine numba do pandas exige a coluna agregada em ponto flutuante NumPy
+    dados['usd'] = dados['usd'].astype('float64')
+    medias = (
+        dados
+        .groupby('cargo', observed=True, sort=False)['usd']
+        .mean(engine='numba', engine_kwargs=NUMBA_KWARGS)
+        .reset_index()
+    )
+    # Empates no corte do top 10 são resolvidos pelo nome do cargo, independentemente
+    # da ordem em que os grupos aparecem; o gráfico recebe do menor para o maior
+    top_cargos = medias.sort_values(['usd', 'cargo'], ascending=[False, True]).head(10)
+    return top_cargos.iloc[::-1].reset_index(drop=True)
+
+
+@st.cache_data(ttl=3600)
+def calcular_contagem_remoto(_tabela: pa.Table, selecoes: tuple, versao_dados: int) -> dict:
+    # Contagem direto na coluna Arrow; só aparecem os valores presentes nos dados
+    contagem = pc.value_counts(_tabela.column('remoto'))
+    return {
+        'tipo_trabalho': contagem.field('values').to_pylist(),
+        'quantidade': contagem.field('counts').to_pylist(),
+    }
+
+
+@st.cache_data(ttl=3600)
+def calcular_media_ds_pais(_tabela: pa.Table, selecoes: tuple, versao_dados: int) -> pd.DataFrame:
+    # Reaproveita a tabela Arrow já filtrada: só o recorte de Cientistas de Dados
+    # (sem países nulos) e a média por país no motor de agregação do Arrow
+    tabela_ds = (
+        _tabela.select(['residencia_iso3', 'usd'])
+        .filter(pc.equal(_tabela['cargo'], 'Data Scientist'))
+        .drop_null()
+    )
+    media_ds_pais = tabela_ds.group_by('residencia_iso3').aggregate([('usd', 'mean')]).to_pandas()
+    return media_ds_pais.rename(columns={'usd_mean': 'usd'})
+
+
+versao_dados = ARQUIVO_DADOS.stat().st_mtime_ns
+df = carregar_dados(ARQUIVO_DADOS, versao_dados)
+aquecer_numba()
+# Opções dos filtros direto das categorias (já ordenadas), sem varrer as colunas
+opcoes_filtros = {coluna: df[coluna].cat.categories.tolist() for coluna in COLUNAS_FILTRO}
 
 # --- Barra Lateral (Filtros) ---
 st.sidebar.header("🔍 Filtros")
 
-anos_disponiveis = sorted(df['ano'].unique())
+anos_disponiveis = opcoes_filtros['ano']
 anos_selecionados = st.sidebar.multiselect("Ano", anos_disponiveis, default=anos_disponiveis)
 
-senioridades_disponiveis = sorted(df['senioridade'].unique())
+senioridades_disponiveis = opcoes_filtros['senioridade']
 senioridades_selecionadas = st.sidebar.multiselect("Senioridade", senioridades_disponiveis, default=senioridades_disponiveis)
 
-contratos_disponiveis = sorted(df['contrato'].unique())
+contratos_disponiveis = opcoes_filtros['contrato']
 contratos_selecionados = st.sidebar.multiselect("Tipo de Contrato", contratos_disponiveis, default=contratos_disponiveis)
 
-tamanhos_disponiveis = sorted(df['tamanho_empresa'].unique())
+tamanhos_disponiveis = opcoes_filtros['tamanho_empresa']
 tamanhos_selecionados = st.sidebar.multiselect("Tamanho da Empresa", tamanhos_disponiveis, default=tamanhos_disponiveis)
 
 # --- Filtragem do DataFrame ---
-df_filtrado = df[
-    (df['ano'].isin(anos_selecionados)) &
-    (df['senioridade'].isin(senioridades_selecionadas)) &
-    (df['contrato'].isin(contratos_selecionados)) &
-    (df['tamanho_empresa'].isin(tamanhos_selecionados))
-]
+# Seleções ordenadas: a mesma escolha feita em outra ordem gera a mesma chave de cache
+selecoes = (
+    ('ano', tuple(sorted(anos_selecionados))),
+    ('senioridade', tuple(sorted(senioridades_selecionadas))),
+    ('contrato', tuple(sorted(contratos_selecionados))),
+    ('tamanho_empresa', tuple(sorted(tamanhos_selecionados))),
+)
+df_filtrado = filtrar_dados(df, selecoes)
+tabela_filtrada = criar_tabela_filtrada(df_filtrado, selecoes, versao_dados)
 
 # --- Conteúdo Principal ---
 st.title("🎲 Dashboard de Análise Salarial na Área de Dados Desenvolvido com Python – Jean Papa")
@@ -44,10 +278,11 @@ st.markdown("Explore os dados salariais na área de dados nos últimos anos. Uti
 st.subheader("Métricas gerais (Salário anual em USD)")
 
 if not df_filtrado.empty:
-    salario_medio = df_filtrado['usd'].mean()
-    salario_maximo = df_filtrado['usd'].max()
-    total_registros = df_filtrado.shape[0]
-    cargo_mais_frequente = df_filtrado["cargo"].mode()[0]
+    kpis = calcular_kpis(tabela_filtrada, selecoes, versao_dados)
+    salario_medio = kpis['salario_medio']
+    salario_maximo = kpis['salario_maximo']
+    total_registros = kpis['total_registros']
+    cargo_mais_frequente = kpis['cargo_mais_frequente']
 else:
     salario_medio = 0
     salario_maximo = 0
@@ -67,39 +302,31 @@ st.subheader("Gráficos")
 
 col_graf1, col_graf2 = st.columns(2)
 
-# Top 10 cargos por salário médio (mantém color='cargo', mas sem legenda visível)
+# Top 10 cargos por salário médio (uma cor por cargo, sem legenda)
+# Figuras montadas com graph_objects a partir dos arrays já agregados, sem a
+# inferência de tipos e o reagrupamento por cor feitos pelo plotly.express
 with col_graf1:
     if not df_filtrado.empty:
-        top_cargos = (
-            df_filtrado
-            .groupby('cargo')['usd']
-            .mean()
-            .nlargest(10)
-            .sort_values(ascending=True)
-            .reset_index()
-        )
+        top_cargos = calcular_top_cargos(tabela_filtrada, selecoes, versao_dados)
+        cargos = top_cargos['cargo'].to_numpy()
+        paleta = px.colors.qualitative.Set2
 
-        grafico_cargos = px.bar(
-            top_cargos,
-            x='usd',
-            y='cargo',
+        grafico_cargos = go.Figure(go.Bar(
+            x=top_cargos['usd'].to_numpy(),
+            y=cargos,
             orientation='h',
-            color='cargo',  # mantém cores por cargo
-            title="Top 10 cargos por salário médio",
-            labels={'usd': 'Média salarial anual (USD)', 'cargo': ''},
-            color_discrete_sequence=px.colors.qualitative.Set2
-        )
-
-        grafico_cargos.update_traces(
-            text=top_cargos['usd'].round(0),
+            marker_color=[paleta[i % len(paleta)] for i in range(len(cargos))],  # mantém cores por cargo
             texttemplate='%{x:,.0f}',
-            textposition='outside'
-        )
+            textposition='outside',
+            hovertemplate="%{y}<br>Média salarial anual (USD): %{x:,.0f}<extra></extra>"
+        ))
 
         grafico_cargos.update_layout(
+            title="Top 10 cargos por salário médio",
             title_x=0.1,
             showlegend=False,  # legenda oculta por padrão
-            yaxis={'categoryorder': 'array', 'categoryarray': top_cargos['cargo']},
+            xaxis_title='Média salarial anual (USD)',
+            yaxis={'categoryorder': 'array', 'categoryarray': cargos},
             margin=dict(t=60, b=60, l=10, r=10)
         )
 
@@ -112,36 +339,20 @@ with col_graf2:
     if not df_filtrado.empty:
         s = df_filtrado['usd'].dropna().astype(float)
         n = s.size
+        nbins = calcular_nbins(np.sort(s.to_numpy(dtype=np.float64))) if n > 0 else 30
 
-        # Cálculo adaptativo de nbins: Freedman–Diaconis com fallback para Sturges
-        def calcular_nbins(series: pd.Series) -> int:
-            n_local = series.size
-            if n_local <= 1:
-                return 10
-            q1, q3 = np.percentile(series, [25, 75])
-            iqr = q3 - q1
-            data_range = float(series.max() - series.min())
-            nbins_fd = None
-            if iqr > 0 and data_range > 0:
-                h = 2 * iqr * (n_local ** (-1/3))
-                if h > 0:
-                    nbins_fd = int(np.clip(round(data_range / h), 5, 100))
-            if nbins_fd and nbins_fd >= 5:
-                return nbins_fd
-            # Fallback Sturges
-            nbins_sturges = int(np.clip(np.ceil(np.log2(max(n_local, 2)) + 1), 5, 100))
-            return nbins_sturges
-
-        nbins = calcular_nbins(s) if n > 0 else 30
-
-        grafico_hist = px.histogram(
-            df_filtrado,
-            x='usd',
-            nbins=nbins,
-            title="Distribuição de salários anuais",
-            labels={'usd': 'Faixa salarial (USD)'},
-            color_discrete_sequence=px.colors.qualitative.Set2
-        )
+        # Contagens por faixa calculadas no servidor: o gráfico recebe só nbins barras,
+        # em vez de todos os registros para o Plotly agrupar no navegador
+        contagens, bordas = np.histogram(s.to_numpy(), bins=nbins)
+        centros = 0.5 * (bordas[:-1] + bordas[1:])
+
+        grafico_hist = go.Figure(go.Bar(
+            x=centros,
+            y=contagens,
+            width=np.diff(bordas),
+            customdata=np.column_stack([bordas[:-1], bordas[1:]]),  # limites de cada faixa, para o hover
+            marker_color=px.colors.qualitative.Set2[0]
+        ))
 
         # Linhas de referência: média e mediana
         if n > 0:
@@ -158,16 +369,18 @@ with col_graf2:
 
         # Formatação de eixos e hover
         grafico_hist.update_layout(
+            title="Distribuição de salários anuais",
             title_x=0.1,
             margin=dict(t=60, b=60, l=10, r=10)
         )
         grafico_hist.update_yaxes(title_text='Quantidade')
         grafico_hist.update_xaxes(
+            title_text='Faixa salarial (USD)',
             tickformat=',.0f'
         )
 
         grafico_hist.update_traces(
-            hovertemplate="Faixa salarial: $%{x:,.0f}<br>Quantidade: %{y:,}<extra></extra>"
+            hovertemplate="Faixa salarial: $%{customdata[0]:,.0f}–$%{customdata[1]:,.0f}<br>Quantidade: %{y:,}<extra></extra>"
         )
 
         st.plotly_chart(grafico_hist, use_container_width=True)
@@ -179,17 +392,14 @@ col_graf3, col_graf4 = st.columns(2)
 
 with col_graf3:
     if not df_filtrado.empty:
-        remoto_contagem = df_filtrado['remoto'].value_counts().reset_index()
-        remoto_contagem.columns = ['tipo_trabalho', 'quantidade']
-        grafico_remoto = px.pie(
-            remoto_contagem,
-            names='tipo_trabalho',
-            values='quantidade',
-            title='Proporção dos tipos de trabalho',
-            hole=0.5
-        )
-        grafico_remoto.update_traces(textinfo='percent+label')
-        grafico_remoto.update_layout(title_x=0.1)
+        remoto_contagem = calcular_contagem_remoto(tabela_filtrada, selecoes, versao_dados)
+        grafico_remoto = go.Figure(go.Pie(
+            labels=remoto_contagem['tipo_trabalho'],
+            values=remoto_contagem['quantidade'],
+            hole=0.5,
+            textinfo='percent+label'
+        ))
+        grafico_remoto.update_layout(title='Proporção dos tipos de trabalho', title_x=0.1)
         st.plotly_chart(grafico_remoto, use_container_width=True)
     else:
         st.warning("Nenhum dado para exibir no gráfico dos tipos de trabalho.")
@@ -197,9 +407,8 @@ with col_graf3:
 # Mapa por país (exemplo com Cientista de Dados)
 with col_graf4:
     if not df_filtrado.empty:
-        df_ds = df_filtrado[df_filtrado['cargo'] == 'Data Scientist']
-        if not df_ds.empty:
-            media_ds_pais = df_ds.groupby('residencia_iso3')['usd'].mean().reset_index()
+        media_ds_pais = calcular_media_ds_pais(tabela_filtrada, selecoes, versao_dados)
+        if not media_ds_pais.empty:
             grafico_paises = px.choropleth(
                 media_ds_pais,
                 locations='residencia_iso3',
@@ -217,4 +426,12 @@ with col_graf4:
 
 # --- Tabela de Dados Detalhados ---
 st.subheader("Dados Detalhados")
-st.dataframe(df_filtrado)
+
+# Paginação: só a página atual é serializada e enviada ao navegador
+TAMANHO_PAGINA = 100
+total_paginas = max(1, -(-len(df_filtrado) // TAMANHO_PAGINA))
+pagina = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, step=1)
+inicio = (pagina - 1) * TAMANHO_PAGINA
+fim = min(inicio + TAMANHO_PAGINA, len(df_filtrado))
+st.caption(f"Exibindo registros {inicio + 1 if fim else 0:,}–{fim:,} de {len(df_filtrado):,} (página {pagina} de {total_paginas})")
+st.dataframe(df_filtrado.iloc[inicio:fim])
@@ -0,0 +1,12 @@
+import pandas as pd
+
+# --- Conversão única do CSV para Parquet ---
+# O dashboard lê o Parquet (colunar, tipado e comprimido), evitando o parsing
+# do CSV a cada inicialização. Rode novamente sempre que o CSV for atualizado:
+#   python gerar_parquet.py
+ARQUIVO_CSV = "dados-imersao-final.csv"
+ARQUIVO_PARQUET = "dados.parquet"
+
+df = pd.read_csv(ARQUIVO_CSV, dtype_backend="pyarrow", engine="pyarrow")
+df.to_parquet(ARQUIVO_PARQUET, engine="pyarrow", compression="zstd", index=False)
+print(f"{len(df):,} registros gravados em {ARQUIVO_PARQUET}")